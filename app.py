@@ -1,8 +1,13 @@
 import streamlit as st
 from google import genai
-from config import GOOGLE_API_KEY, GEMINI_MODEL, MAX_TOKENS, TEMPERATURE
+from config import GOOGLE_API_KEY, GEMINI_MODEL, MAX_TOKENS, TEMPERATURE, USE_FAKE_BACKEND
+from config import NEWS_DIGEST_ENABLED, NEWS_DIGEST_REGIONS, TRACE_ENABLED
 import time
 from datetime import datetime
+from catalog import get_catalog
+from compare import compare_models
+from messages import MessageLog, format_time, memory_report
+import tracing
 
 # Check if API key is available
 if GOOGLE_API_KEY == "MISSING_API_KEY":
@@ -22,52 +27,77 @@ if GOOGLE_API_KEY == "MISSING_API_KEY":
     st.stop()
 
 # Configure Gemini API
-# Configure Gemini Client
-client = genai.Client(api_key=GOOGLE_API_KEY)
+# Configure Gemini Client (offline fake when MINDSEEK_FAKE_BACKEND=1)
+if USE_FAKE_BACKEND:
+    from fake_backend import FakeClient
+    client = FakeClient()
+else:
+    client = genai.Client(api_key=GOOGLE_API_KEY)
+
+# Model metadata, loaded once per process and refreshed in the background
+model_catalog = get_catalog(client)
+
+# Drop any trace left open by an earlier run that was cut short; only the
+# trace started by this run's on_change callback (tagged below) is kept
+tracing.discard_stale_trace(st.session_state.pop("callback_trace_id", None))
+
+# Time the rest of this script run as the "rerun" stage of a traced turn
+rerun_span = tracing.start_span("rerun")
+
+# Start the background news digest worker (once per process)
+if NEWS_DIGEST_ENABLED:
+    from digest import feed_key, get_scheduler
+    from news import TOPIC_MAP
+    digest_scheduler = get_scheduler(client)
 
 # Function to process messages (defined BEFORE it's used)
 def process_message(prompt):
     if not prompt or not prompt.strip():
         return
+    
+    # Comparison mode fans the prompt out to several models instead
+    if st.session_state.get("compare_mode"):
+        compare_selection = [m for m in st.session_state.get("compare_models", []) if model_catalog.is_chat_model(m)]
+        if len(compare_selection) < 2:
+            st.info("Select at least two models to compare, or turn off Compare Models.")
+            return
+        process_comparison(prompt, compare_selection)
+        return
         
-    # Add user message to chat history with timestamp
-    current_time = datetime.now().strftime("%H:%M")
-    st.session_state.messages.append({
-        "role": "user", 
-        "content": prompt,
-        "timestamp": current_time,
-        "message_id": len(st.session_state.messages) + 1
-    })
-    st.session_state.chat_count += 1
+    # Add user message to chat history (timestamp is formatted at render time)
+    with tracing.span("context"):
+        created_at = time.time()
+        message_id = st.session_state.messages.append("user", prompt, created_at)
+        st.session_state.chat_count += 1
+        model = model_catalog.validate(st.session_state.get("model_option", GEMINI_MODEL))
+        generation_config = genai.types.GenerateContentConfig(
+            max_output_tokens=model_catalog.clamp_output_tokens(model, MAX_TOKENS),
+            temperature=st.session_state.get("temperature", TEMPERATURE),
+        )
     
     # Display user message immediately
-    display_message("user", prompt, current_time, len(st.session_state.messages))
+    with tracing.span("render"):
+        display_message("user", prompt, format_time(created_at), message_id)
     
     # Get response from Gemini
     try:
         with st.spinner("🤖 AI is thinking..."):
-            response = client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=prompt,
-                config=genai.types.GenerateContentConfig(
-                    max_output_tokens=MAX_TOKENS,
-                    temperature=TEMPERATURE,
+            with tracing.span("upstream", model=model):
+                response = client.models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=generation_config
                 )
-            )
             
             if response.text:
-                # Add assistant message to chat history with timestamp
-                response_time = datetime.now().strftime("%H:%M")
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": response.text,
-                    "timestamp": response_time,
-                    "message_id": len(st.session_state.messages) + 1
-                })
+                # Add assistant message to chat history
+                created_at = time.time()
+                message_id = st.session_state.messages.append("assistant", response.text, created_at)
                 st.session_state.chat_count += 1
                 
                 # Display assistant response
-                display_message("assistant", response.text, response_time, len(st.session_state.messages))
+                with tracing.span("render"):
+                    display_message("assistant", response.text, format_time(created_at), message_id)
             else:
                 st.error("Sorry, I couldn't generate a response. Please try again.")
                 
@@ -75,6 +105,74 @@ def process_message(prompt):
         st.error(f"Error: {str(e)}")
         st.error("There was an error connecting to the AI service. Please check your API key and try again.")
 
+# Function to send one prompt to several models concurrently and stream each into a column
+def process_comparison(prompt, models):
+    with tracing.span("context", models=len(models)):
+        created_at = time.time()
+        message_id = st.session_state.messages.append("user", prompt, created_at)
+        st.session_state.chat_count += 1
+        max_tokens = {model: model_catalog.clamp_output_tokens(model, MAX_TOKENS) for model in models}
+    
+    with tracing.span("render"):
+        display_message("user", prompt, format_time(created_at), message_id)
+        columns = st.columns(len(models))
+        placeholders = {}
+        for column, model in zip(columns, models):
+            with column:
+                st.markdown(f"**{model}**")
+                placeholders[model] = st.empty()
+    
+    def on_update(model, text):
+        placeholders[model].markdown(text)
+    
+    with tracing.span("upstream", models=len(models)):
+        results, wall_time = compare_models(
+            client,
+            models,
+            prompt,
+            st.session_state.get("temperature", TEMPERATURE),
+            on_update,
+            max_tokens,
+        )
+    # Keep the answers with their turn so history renders them in order
+    comparison = {"prompt": prompt, "results": results, "wall_time": wall_time}
+    st.session_state.comparisons[message_id] = comparison
+    st.session_state.chat_count += sum(1 for result in results if not result["error"])
+    
+    with tracing.span("render"):
+        for column, result in zip(columns, results):
+            with column:
+                display_comparison_stats(result)
+        display_comparison_summary(comparison)
+
+def display_comparison_stats(result):
+    if result["error"]:
+        st.error(f"Error: {result['error']}")
+        return
+    first_chunk = f"{result['first_chunk']:.2f}s" if result["first_chunk"] is not None else "n/a"
+    st.caption(
+        f"⏱️ {result['latency']:.2f}s total · first chunk {first_chunk} · "
+        f"🔤 {result['prompt_tokens'] or 0} in / {result['output_tokens'] or 0} out tokens"
+    )
+
+def display_comparison_summary(comparison):
+    sequential = sum(r["latency"] for r in comparison["results"])
+    st.caption(
+        f"Wall time {comparison['wall_time']:.2f}s "
+        f"(sequential would be ~{sequential:.2f}s)"
+    )
+
+# Function to redisplay a stored comparison below the prompt it answers
+def display_comparison(comparison):
+    st.markdown("#### ⚖️ Model Comparison")
+    columns = st.columns(len(comparison["results"]))
+    for column, result in zip(columns, comparison["results"]):
+        with column:
+            st.markdown(f"**{result['model']}**")
+            st.markdown(result["text"])
+            display_comparison_stats(result)
+    display_comparison_summary(comparison)
+
 # Function to display messages with enhanced styling
 def display_message(role, content, timestamp=None, message_id=None):
     # Handle old message format (without timestamp/message_id)
@@ -119,6 +217,8 @@ def on_input_change():
     if st.session_state.get("chat_input"):
         prompt = st.session_state.chat_input.strip()
         if prompt:
+            turn_trace = tracing.begin_trace("turn", source="enter")
+            st.session_state["callback_trace_id"] = turn_trace.trace_id if turn_trace else None
             process_message(prompt)
             # Mark that we need to clear input (can't do it here due to Streamlit restrictions)
             st.session_state["clear_input"] = True
@@ -319,13 +419,19 @@ else:
 
 st.markdown(css, unsafe_allow_html=True)
 
-# Initialize session state for chat history
+# Initialize session state for chat history (upgrading old list-of-dicts sessions)
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages = MessageLog()
+else:
+    st.session_state.messages = MessageLog.upgrade(st.session_state.messages)
 
 if "chat_count" not in st.session_state:
     st.session_state.chat_count = 0
 
+# Comparison-mode answers, keyed by the message_id of the prompt they answer
+if "comparisons" not in st.session_state:
+    st.session_state.comparisons = {}
+
 # Enhanced Sidebar
 with st.sidebar:
     st.markdown("""
@@ -337,13 +443,34 @@ with st.sidebar:
     
     # Model selection
     st.markdown("### 🚀 AI Model")
+    chat_models = model_catalog.chat_models()
+    # Drop a previous selection the refreshed catalog no longer offers
+    if st.session_state.get("model_option") not in chat_models:
+        st.session_state.pop("model_option", None)
     model_option = st.selectbox(
         "Choose Model:",
-        ["gemini-2.5-flash", "gemini-2.0-flash", "gemini-1.5-flash", "gemini-1.5-pro"],
-        index=0,
-        label_visibility="collapsed"
+        chat_models,
+        index=chat_models.index(GEMINI_MODEL) if GEMINI_MODEL in chat_models else 0,
+        label_visibility="collapsed",
+        key="model_option"
     )
     
+    # Comparison mode
+    compare_mode = st.toggle("⚖️ Compare Models", key="compare_mode",
+                             help="Send each prompt to several models at once")
+    if compare_mode:
+        previous = st.session_state.get("compare_models")
+        if previous is not None and any(m not in chat_models for m in previous):
+            st.session_state.compare_models = [m for m in previous if m in chat_models]
+        st.multiselect(
+            "Models to compare:",
+            chat_models,
+            default=chat_models[:2],
+            key="compare_models",
+        )
+        if len(st.session_state.get("compare_models", [])) < 2:
+            st.caption("Pick at least two models to send a comparison.")
+    
     # Temperature slider
     st.markdown("### 🎭 Creativity Level")
     temperature = st.slider(
@@ -353,13 +480,15 @@ with st.sidebar:
         value=TEMPERATURE,
         step=0.1,
         help="Lower values = more focused, Higher values = more creative",
-        label_visibility="collapsed"
+        label_visibility="collapsed",
+        key="temperature"
     )
     
     # Clear chat button
     if st.button("🗑️ Clear Chat History", use_container_width=True):
-        st.session_state.messages = []
+        st.session_state.messages = MessageLog()
         st.session_state.chat_count = 0
+        st.session_state.comparisons = {}
         st.rerun()
     
     # Chat statistics
@@ -373,6 +502,27 @@ with st.sidebar:
     
     st.markdown(f"**Current Model:** {model_option}")
     
+    # News digest (pre-generated by the background worker, read from cache)
+    if NEWS_DIGEST_ENABLED:
+        st.markdown("### 📰 News Digest")
+        with st.expander("Today's Headlines"):
+            region = st.selectbox(
+                "Region:",
+                NEWS_DIGEST_REGIONS,
+                format_func=lambda r: f"{r[0]} ({r[1]})",
+            )
+            topic = st.selectbox("Topic:", list(TOPIC_MAP))
+            entry = None
+            if region is not None:
+                entry = digest_scheduler.store.get(feed_key(region[0], region[1], topic))
+            if entry:
+                st.markdown(entry["digest"])
+                for item in entry["items"]:
+                    st.markdown(f"- [{item['title']}]({item['link']})")
+                st.caption(f"Generated at {format_time(entry['generated_at'])}")
+            else:
+                st.info("Digest is being prepared. Check back shortly.")
+    
     # About section
     st.markdown("### ℹ️ About")
     st.markdown("**Powered by Google Gemini AI**")
@@ -386,12 +536,43 @@ with st.sidebar:
             st.write("SDK Version: Unknown")
             
         if st.button("List Available Models"):
-            try:
-                models = client.models.list()
-                for m in models:
-                    st.code(m.name)
-            except Exception as e:
-                st.error(f"Error listing models: {e}")
+            # Served from the cached catalog; no API call on this path
+            if model_catalog.loaded_at is None:
+                st.info("Model catalog is still loading; showing configured models.")
+            else:
+                st.caption(f"Catalog loaded at {format_time(model_catalog.loaded_at, '%H:%M:%S')}")
+            if model_catalog.error:
+                st.error(f"Error listing models: {model_catalog.error}")
+            for m in model_catalog.models():
+                limits = f"in {m.input_token_limit or '?'} / out {m.output_token_limit or '?'} tokens"
+                actions = ", ".join(m.supported_actions) if m.supported_actions else "unknown"
+                st.code(f"{m.name}\n{limits}\nsupports: {actions}")
+        
+        if st.button("Refresh Model Catalog"):
+            model_catalog.refresh(force=True)
+            st.info("Refreshing model catalog in the background.")
+        
+        if st.button("Measure Session Memory"):
+            report = memory_report(st.session_state.messages, st.session_state.comparisons)
+            st.write(f"Messages: {report['messages']} "
+                     f"(plus {report['comparison_answers']} comparison answers)")
+            st.write(f"Compact history: {report['compact_bytes']:,} bytes "
+                     f"({report['compact_bytes_per_message']:.0f} B/message)")
+            st.write(f"Dict-based equivalent: {report['dict_bytes']:,} bytes "
+                     f"({report['dict_bytes_per_message']:.0f} B/message)")
+            st.write(f"Comparison answers: {report['comparison_bytes']:,} bytes")
+            st.write(f"Pickled size: {report['compact_pickle_bytes']:,} bytes "
+                     f"(dicts: {report['dict_pickle_bytes']:,})")
+        
+        if TRACE_ENABLED:
+            if st.button("Show Turn Traces"):
+                traces = tracing.recent_traces(limit=5, name="turn")
+                if not traces:
+                    st.info("No traces recorded yet.")
+                for trace_data in traces:
+                    st.markdown(tracing.waterfall_html(trace_data), unsafe_allow_html=True)
+        else:
+            st.caption("Tracing is off. Set MINDSEEK_TRACE=1 to record turn traces.")
 
 # Enhanced Main Header
 st.markdown("""
@@ -409,11 +590,11 @@ with chat_container:
 
     
     # Display chat messages with enhanced styling
-    for message in st.session_state.messages:
-        # Handle both old and new message formats
-        timestamp = message.get("timestamp", "Now")
-        message_id = message.get("message_id", f"msg_{len(st.session_state.messages)}")
-        display_message(message["role"], message["content"], timestamp, message_id)
+    with tracing.span("render", messages=len(st.session_state.messages)):
+        for message in st.session_state.messages:
+            display_message(message.role, message.content, format_time(message.created_at), message.message_id)
+            if message.message_id in st.session_state.comparisons:
+                display_comparison(st.session_state.comparisons[message.message_id])
     
     # Handle input clearing after message sent
     if st.session_state.get("clear_input"):
@@ -445,9 +626,11 @@ with chat_container:
         # Send button with professional send icon
         if st.button("📤", key="send_button", help="Send message"):
             if prompt and prompt.strip():
+                tracing.begin_trace("turn", source="button")
                 process_message(prompt)
                 # Mark that we need to clear input
                 st.session_state["clear_input"] = True
+                tracing.end_trace()
                 st.rerun()
 
 # Enhanced Footer
@@ -460,4 +643,6 @@ st.markdown("""
 </div>
 """.format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")), unsafe_allow_html=True)
 
-
+# Close out the traced turn (no-op when this run isn't traced)
+tracing.end_span(rerun_span)
+tracing.end_trace()
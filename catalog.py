@@ -0,0 +1,142 @@
+# catalog.py
+"""
+Cached model catalog.
+
+Loads `client.models.list()` once per process on a background thread and
+refreshes it after MODEL_CATALOG_TTL seconds, so the UI never waits on
+the network for model metadata. Until the first load finishes (or if it
+fails) the catalog falls back to AVAILABLE_MODELS with unknown limits.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from config import AVAILABLE_MODELS, GEMINI_MODEL, MAX_TOKENS, MODEL_CATALOG_TTL
+
+ModelInfo = namedtuple(
+    "ModelInfo",
+    ["name", "display_name", "input_token_limit", "output_token_limit", "supported_actions"],
+)
+
+RETRY_AFTER = 60  # seconds to wait before retrying a failed load
+
+# generateContent is also offered by speech, image and other specialised
+# models that fail on a plain text prompt; only gemini-* text models can chat
+CHAT_MODEL_PREFIX = "gemini-"
+NON_CHAT_MARKERS = ("-tts", "-image", "-embedding", "-live", "-audio", "-vision")
+
+
+def _short_name(name: str) -> str:
+    """'models/gemini-2.5-flash' -> 'gemini-2.5-flash'"""
+    return name.split("/", 1)[1] if name.startswith("models/") else name
+
+
+def _to_info(model) -> ModelInfo:
+    name = _short_name(model.name)
+    actions = getattr(model, "supported_actions", None)
+    return ModelInfo(
+        name=name,
+        display_name=getattr(model, "display_name", None) or name,
+        input_token_limit=getattr(model, "input_token_limit", None),
+        output_token_limit=getattr(model, "output_token_limit", None),
+        # None means the API didn't say; assume it can chat
+        supported_actions=tuple(actions) if actions is not None else None,
+    )
+
+
+class ModelCatalog:
+    """Model metadata with stale-while-revalidate background refresh."""
+
+    def __init__(self, client, ttl: int = MODEL_CATALOG_TTL, fallback=AVAILABLE_MODELS):
+        self.client = client
+        self.ttl = ttl
+        self._models = {name: ModelInfo(name, name, None, None, None) for name in fallback}
+        self.loaded_at = None  # None while still serving the fallback list
+        self.error = None
+        self._next_refresh = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        """Reload the catalog in the background if it is due (or forced)."""
+        with self._lock:
+            if self._refreshing or (not force and time.time() < self._next_refresh):
+                return
+            self._refreshing = True
+        threading.Thread(target=self._load, name="model-catalog", daemon=True).start()
+
+    def _load(self):
+        try:
+            models = {}
+            for model in self.client.models.list():
+                info = _to_info(model)
+                models[info.name] = info
+            if models:
+                self._models = models
+            self.loaded_at = time.time()
+            self.error = None
+            self._next_refresh = time.time() + self.ttl
+        except Exception as e:
+            self.error = str(e)
+            self._next_refresh = time.time() + RETRY_AFTER
+        finally:
+            self._refreshing = False
+
+    def models(self):
+        self.refresh()
+        return list(self._models.values())
+
+    def get(self, name: str):
+        self.refresh()
+        return self._models.get(_short_name(name))
+
+    def supports(self, name: str, action: str = "generateContent") -> bool:
+        info = self.get(name)
+        if info is None:
+            return False
+        return info.supported_actions is None or action in info.supported_actions
+
+    def is_chat_model(self, name: str) -> bool:
+        """True for text chat models: gemini-* models that support generateContent."""
+        short = _short_name(name)
+        return (
+            short.startswith(CHAT_MODEL_PREFIX)
+            and not any(marker in short for marker in NON_CHAT_MARKERS)
+            and self.supports(short)
+        )
+
+    def chat_models(self):
+        """Names of text chat models, configured models first."""
+        names = [info.name for info in self.models() if self.is_chat_model(info.name)]
+        preferred = [name for name in AVAILABLE_MODELS if name in names]
+        return preferred + sorted(name for name in names if name not in preferred)
+
+    def validate(self, name: str, default: str = GEMINI_MODEL) -> str:
+        """Return `name` if it can chat, otherwise the best available substitute."""
+        if name and self.is_chat_model(name):
+            return _short_name(name)
+        chat_models = self.chat_models()
+        if default in chat_models or not chat_models:
+            return default
+        return chat_models[0]
+
+    def clamp_output_tokens(self, name: str, requested: int = MAX_TOKENS) -> int:
+        """Cap an output token budget at the model's limit, when known."""
+        info = self.get(name)
+        if info is None or not info.output_token_limit:
+            return requested
+        return min(requested, info.output_token_limit)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(client) -> ModelCatalog:
+    """Create the catalog once per process and kick off its first load."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ModelCatalog(client)
+            _catalog.refresh()
+        return _catalog
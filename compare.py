@@ -0,0 +1,81 @@
+# compare.py
+"""
+Multi-model comparison mode.
+
+Sends the same prompt to several Gemini models at once through the SDK's
+async client (`client.aio`) and streams each answer back as it arrives,
+so total wall time is close to the slowest model rather than the sum.
+"""
+import asyncio
+import time
+
+from google import genai
+
+import tracing
+from config import MAX_TOKENS
+
+
+async def _stream_model(client, model, prompt, temperature, on_update, max_tokens):
+    """Stream one model's answer, calling on_update(model, text) per chunk."""
+    result = {
+        "model": model,
+        "text": "",
+        "latency": 0.0,
+        "first_chunk": None,
+        "prompt_tokens": None,
+        "output_tokens": None,
+        "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        with tracing.span("stream", model=model):
+            stream = await client.aio.models.generate_content_stream(
+                model=model,
+                contents=prompt,
+                config=genai.types.GenerateContentConfig(
+                    max_output_tokens=max_tokens,
+                    temperature=temperature,
+                ),
+            )
+            async for chunk in stream:
+                if result["first_chunk"] is None:
+                    result["first_chunk"] = time.perf_counter() - start
+                if chunk.text:
+                    result["text"] += chunk.text
+                    on_update(model, result["text"])
+                # Usage metadata is cumulative, so the last chunk carries the totals
+                usage = getattr(chunk, "usage_metadata", None)
+                if usage is not None:
+                    result["prompt_tokens"] = usage.prompt_token_count
+                    result["output_tokens"] = usage.candidates_token_count
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency"] = time.perf_counter() - start
+    return result
+
+
+async def compare_models_async(client, models, prompt, temperature, on_update=None, max_tokens=None):
+    """
+    Fan the prompt out to every model concurrently.
+    max_tokens optionally maps model name -> output token budget (default MAX_TOKENS).
+    """
+    on_update = on_update or (lambda model, text: None)
+    max_tokens = max_tokens or {}
+    return await asyncio.gather(
+        *(
+            _stream_model(client, model, prompt, temperature, on_update, max_tokens.get(model, MAX_TOKENS))
+            for model in models
+        )
+    )
+
+
+def compare_models(client, models, prompt, temperature, on_update=None, max_tokens=None):
+    """
+    Run a comparison from synchronous code (e.g. a Streamlit script).
+    Returns (results, wall_time) with results in the same order as models.
+    """
+    start = time.perf_counter()
+    results = asyncio.run(
+        compare_models_async(client, models, prompt, temperature, on_update, max_tokens)
+    )
+    return list(results), time.perf_counter() - start
@@ -13,11 +13,38 @@ STREAMLIT_SERVER_ADDRESS = os.getenv("STREAMLIT_SERVER_ADDRESS", "localhost")
 
 # Model Configuration
 GEMINI_MODEL = "gemini-2.5-flash"  # Testing newer model availability
+AVAILABLE_MODELS = ["gemini-2.5-flash", "gemini-2.0-flash", "gemini-1.5-flash", "gemini-1.5-pro"]
 MAX_TOKENS = 1000
 TEMPERATURE = 0.7
+MODEL_CATALOG_TTL = int(os.getenv("MINDSEEK_MODEL_CATALOG_TTL", "3600"))  # seconds before model list refresh
+
+# Offline fake backend (used by loadtest.py and local development without a key)
+USE_FAKE_BACKEND = os.getenv("MINDSEEK_FAKE_BACKEND", "0") == "1"
+FAKE_BACKEND_LATENCY = float(os.getenv("MINDSEEK_FAKE_LATENCY", "0.5"))
+
+# News digest worker (prefetches TOPIC_MAP feeds and pre-generates summaries)
+NEWS_DIGEST_ENABLED = os.getenv("MINDSEEK_NEWS_DIGEST", "0" if USE_FAKE_BACKEND else "1") == "1"
+NEWS_DIGEST_INTERVAL = int(os.getenv("MINDSEEK_DIGEST_INTERVAL", "1800"))  # seconds between refreshes
+NEWS_DIGEST_DIR = os.getenv("MINDSEEK_DIGEST_DIR", ".digest_cache")
+# Comma-separated COUNTRY:language pairs, e.g. "US:en,IN:en,GB:en"
+NEWS_DIGEST_REGIONS = [
+    tuple(part.strip() for part in pair.split(":", 1))
+    for pair in os.getenv("MINDSEEK_DIGEST_REGIONS", "US:en").split(",")
+    if ":" in pair and all(part.strip() for part in pair.split(":", 1))
+]
+if not NEWS_DIGEST_REGIONS:
+    print("⚠️  WARNING: MINDSEEK_DIGEST_REGIONS has no COUNTRY:language pairs (e.g. US:en)")
+    print("   Falling back to US:en")
+    NEWS_DIGEST_REGIONS = [("US", "en")]
+
+# Per-turn tracing (off by default; see tracing.py)
+TRACE_ENABLED = os.getenv("MINDSEEK_TRACE", "0") == "1"
+TRACE_SAMPLE_RATE = float(os.getenv("MINDSEEK_TRACE_SAMPLE_RATE", "1.0"))  # fraction of turns traced
+TRACE_FILE = os.getenv("MINDSEEK_TRACE_FILE", "traces.jsonl")
+TRACE_MAX_BYTES = 5 * 1024 * 1024  # rotate the trace file past this size
 
 # Validate configuration with better error message
-if not GOOGLE_API_KEY:
+if not GOOGLE_API_KEY and not USE_FAKE_BACKEND:
     print("⚠️  WARNING: GOOGLE_API_KEY not found!")
     print("   Please add your API key in Streamlit Cloud:")
     print("   1. Go to your app settings")
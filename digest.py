@@ -0,0 +1,228 @@
+# digest.py
+"""
+Background news prefetch and pre-generated Gemini digests.
+
+A daemon thread periodically fetches every TOPIC_MAP feed for the
+configured country/language pairs and asks Gemini for a short digest of
+each one. Results are written to NEWS_DIGEST_DIR as JSON so the UI only
+reads a file. Work is coalesced across Streamlit worker processes with a
+per-feed lock file, and a feed whose headlines hash to the same value as
+last time keeps its existing digest instead of being summarized again.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from google import genai
+
+from config import (
+    GEMINI_MODEL,
+    MAX_TOKENS,
+    NEWS_DIGEST_DIR,
+    NEWS_DIGEST_INTERVAL,
+    NEWS_DIGEST_REGIONS,
+)
+from news import TOPIC_MAP, fetch_news
+import tracing
+
+DIGEST_PROMPT = (
+    "Summarize today's {topic} news in 3-5 short bullet points. "
+    "Only use the headlines below.\n\n{headlines}"
+)
+LOCK_TIMEOUT = 300  # seconds before a crashed worker's lock is taken over
+
+
+def feed_key(country: str, language: str, topic_key: str) -> str:
+    """File-safe key for one country/language/topic feed."""
+    slug = re.sub(r"[^a-z0-9]+", "-", topic_key.lower()).strip("-")
+    return f"{country}_{language}_{slug}"
+
+
+def content_hash(items) -> str:
+    """Hash of the feed content that matters for the digest (not display times)."""
+    h = hashlib.sha256()
+    for item in items:
+        for field in ("title", "summary", "link"):
+            h.update(item.get(field, "").encode("utf-8"))
+            h.update(b"\0")
+    return h.hexdigest()
+
+
+def summarize(client, topic_key: str, items, model: str = GEMINI_MODEL) -> str:
+    """Ask Gemini for a digest of the given news items."""
+    headlines = "\n".join(
+        f"{i}. {item['title']} ({item['source']})" for i, item in enumerate(items, 1)
+    )
+    with tracing.span("upstream", model=model):
+        response = client.models.generate_content(
+            model=model,
+            contents=DIGEST_PROMPT.format(topic=topic_key, headlines=headlines),
+            config=genai.types.GenerateContentConfig(
+                max_output_tokens=MAX_TOKENS,
+                temperature=0.3,
+            ),
+        )
+    return response.text or ""
+
+
+class DigestStore:
+    """JSON files on disk, one per feed, shared by every worker process."""
+
+    def __init__(self, directory: str = NEWS_DIGEST_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._cache = {}  # key -> (mtime, entry)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        """Return the stored entry for a feed, or None if it hasn't been generated yet."""
+        path = self._path(key)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        cached = self._cache.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._cache[key] = (mtime, entry)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        """Write an entry atomically so readers never see a partial file."""
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def try_lock(self, key: str, stale_after: float) -> bool:
+        """Claim a feed for this process; False if another worker holds it."""
+        path = self._path(key) + ".lock"
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) < stale_after:
+                        return False
+                    # Holder died mid-refresh; take the lock over
+                    os.remove(path)
+                except OSError:
+                    return False
+                continue
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            return True
+        return False
+
+    def unlock(self, key: str):
+        try:
+            os.remove(self._path(key) + ".lock")
+        except OSError:
+            pass
+
+
+class DigestScheduler:
+    """Periodically refreshes every configured feed on a daemon thread."""
+
+    def __init__(self, client, store: DigestStore, regions=NEWS_DIGEST_REGIONS,
+                 interval: int = NEWS_DIGEST_INTERVAL, model: str = GEMINI_MODEL, limit: int = 8):
+        self.client = client
+        self.store = store
+        self.regions = list(regions)
+        self.interval = interval
+        self.model = model
+        self.limit = limit
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="news-digest", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_all()
+            self._stop.wait(self.interval)
+
+    def refresh_all(self):
+        for country, language in self.regions:
+            for topic_key in TOPIC_MAP:
+                if self._stop.is_set():
+                    return
+                try:
+                    with tracing.job_trace("digest", country=country, language=language, topic=topic_key):
+                        self.refresh(country, language, topic_key)
+                except Exception as e:
+                    print(f"⚠️  News digest failed for {country}/{language}/{topic_key}: {e}")
+
+    def refresh(self, country: str, language: str, topic_key: str):
+        """Fetch one feed and regenerate its digest if the headlines changed."""
+        key = feed_key(country, language, topic_key)
+        if not self.store.try_lock(key, stale_after=LOCK_TIMEOUT):
+            return self.store.get(key)  # another worker is on it
+
+        try:
+            current = self.store.get(key)
+            if current and time.time() - current["fetched_at"] < self.interval / 2:
+                return current  # another worker refreshed it recently
+
+            items = fetch_news(topic_key, country=country, language=language, limit=self.limit)
+            if not items:
+                return current
+
+            new_hash = content_hash(items)
+            if current and current["content_hash"] == new_hash:
+                current["fetched_at"] = time.time()
+                self.store.put(key, current)
+                return current
+
+            digest = summarize(self.client, topic_key, items, self.model)
+            if not digest.strip():
+                # Don't record the new hash, so the next cycle tries again
+                print(f"⚠️  Empty news digest for {country}/{language}/{topic_key}; will retry")
+                return current
+
+            entry = {
+                "country": country,
+                "language": language,
+                "topic": topic_key,
+                "items": items,
+                "content_hash": new_hash,
+                "digest": digest,
+                "model": self.model,
+                "fetched_at": time.time(),
+                "generated_at": time.time(),
+            }
+            self.store.put(key, entry)
+            return entry
+        finally:
+            self.store.unlock(key)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(client) -> DigestScheduler:
+    """Start the digest worker once per process and return it."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DigestScheduler(client, DigestStore())
+            _scheduler.start()
+        return _scheduler
@@ -0,0 +1,88 @@
+# fake_backend.py
+"""
+Offline stand-in for the Gemini client.
+
+Mirrors the small part of `genai.Client` that MindSeek uses
+(`client.models.generate_content`, `client.models.list` and
+`client.aio.models.generate_content_stream`) so the app can run without
+network access or an API key. Enable it with
+MINDSEEK_FAKE_BACKEND=1; MINDSEEK_FAKE_LATENCY sets the simulated
+upstream latency in seconds.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+from config import FAKE_BACKEND_LATENCY
+
+FAKE_MODELS = [
+    "models/gemini-2.5-flash",
+    "models/gemini-2.0-flash",
+    "models/gemini-1.5-flash",
+    "models/gemini-1.5-pro",
+]
+
+
+def _fake_response(model, contents, text=None):
+    text = f"[{model}] You said: {contents}" if text is None else text
+    return SimpleNamespace(
+        text=text,
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=len(str(contents).split()),
+            candidates_token_count=len(text.split()),
+        ),
+    )
+
+
+class _FakeModels:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, model, contents, config=None):
+        """Sleep for the configured latency and echo the prompt back."""
+        time.sleep(self.latency)
+        return _fake_response(model, contents)
+
+    def list(self):
+        return [
+            SimpleNamespace(
+                name=name,
+                display_name=name.split("/", 1)[1],
+                input_token_limit=1048576,
+                output_token_limit=8192,
+                supported_actions=["generateContent", "countTokens"],
+            )
+            for name in FAKE_MODELS
+        ]
+
+
+class _FakeAsyncModels:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(self.latency)
+        return _fake_response(model, contents)
+
+    async def generate_content_stream(self, model, contents, config=None):
+        """Spread the configured latency over a few streamed chunks."""
+        words = _fake_response(model, contents).text.split(" ")
+
+        async def stream():
+            step = max(1, len(words) // 4)
+            for i in range(0, len(words), step):
+                await asyncio.sleep(self.latency / 4)
+                chunk = _fake_response(model, contents, " ".join(words[i:i + step]) + " ")
+                # Like the real API, usage on each chunk is cumulative
+                chunk.usage_metadata.candidates_token_count = len(words[:i + step])
+                yield chunk
+
+        return stream()
+
+
+class FakeClient:
+    """Drop-in replacement for `genai.Client` backed by canned responses."""
+
+    def __init__(self, latency: float = FAKE_BACKEND_LATENCY):
+        self.models = _FakeModels(latency)
+        self.aio = SimpleNamespace(models=_FakeAsyncModels(latency))
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+MindSeek Load Test
+Drives many simulated Streamlit sessions through app.py against the
+offline fake backend and reports throughput, rerun latency, CPU and RSS.
+
+Each session is a real `AppTest` run of app.py: it loads the page, then
+types prompts into the chat input, which fires `on_input_change` ->
+`process_message` and the rerun that follows. Sessions run on threads in
+this process, the same way one Streamlit server runs every session.
+
+Usage:
+    python loadtest.py --sessions 20 --turns 5 --think-time 1 --arrival-rate 4
+    python loadtest.py --sessions 20 --compare loadtest_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Metrics where a higher value in the new run is a regression
+LOWER_IS_BETTER = [
+    "rerun_p50_ms",
+    "rerun_p95_ms",
+    "rerun_p99_ms",
+    "cpu_seconds_per_session",
+    "rss_bytes_per_session",
+]
+# Metrics where a lower value in the new run is a regression
+HIGHER_IS_BETTER = ["throughput_turns_per_sec"]
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Load test MindSeek with simulated sessions")
+    parser.add_argument("--sessions", type=int, default=10, help="Number of simulated sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Prompts sent per session")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="Mean seconds a user waits between prompts (0 = no wait)")
+    parser.add_argument("--arrival-rate", type=float, default=0.0,
+                        help="New sessions per second (0 = all sessions start at once)")
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Simulated upstream model latency in seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for think/arrival times")
+    parser.add_argument("--output", default="loadtest_results.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", help="Previous JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative change before a metric counts as a regression")
+    return parser.parse_args(argv)
+
+
+def _rss_bytes():
+    """Current resident set size of this process, or peak RSS when psutil is unavailable"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def shared_runtime():
+    """
+    Let overlapping AppTest runs share process-wide state like a real server.
+
+    AppTest installs a mock `Runtime._instance` at the start of each run and
+    clears it when the run ends, which crashes every other session still
+    running ("Runtime hasn't been created!"). While the load test runs,
+    `Runtime.instance()` falls back to the most recently installed mock
+    instead of failing. The appTest config patch is also held open for the
+    whole run so the per-run patches, which overlap, unwind to the original.
+
+    AppTest also builds a fresh ScriptCache per run, so app.py is recompiled
+    on every rerun; concurrent `ast.parse` calls are not thread-safe on some
+    Python versions. A real server compiles once into a shared cache, so all
+    runs here share one cache behind a lock.
+
+    These are private Streamlit internals, so the harness stops with a clear
+    message if they have moved, and reports record the Streamlit version.
+    """
+    try:
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+        from streamlit.testing.v1.util import patch_config_options
+    except ImportError as e:
+        raise SystemExit(f"❌ This Streamlit version isn't supported by loadtest.py: {e}")
+    missing = [
+        name
+        for owner, attrs in ((Runtime, ("_instance", "instance", "exists")), (ScriptCache, ("get_bytecode",)))
+        for name in (f"{owner.__name__}.{attr}" for attr in attrs)
+        if name.split(".", 1)[1] not in owner.__dict__
+    ]
+    if missing:
+        raise SystemExit(
+            f"❌ This Streamlit version isn't supported by loadtest.py: missing {', '.join(missing)}"
+        )
+
+    original_instance = Runtime.__dict__["instance"]
+    original_exists = Runtime.__dict__["exists"]
+    last = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+            return cls._instance
+        if last:
+            return last[0]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    def exists(cls):
+        return cls._instance is not None or bool(last)
+
+    original_get_bytecode = ScriptCache.__dict__["get_bytecode"]
+    shared_cache = ScriptCache()
+    compile_lock = threading.Lock()
+
+    def get_bytecode(self, script_path):
+        with compile_lock:
+            return original_get_bytecode(shared_cache, script_path)
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+    ScriptCache.get_bytecode = get_bytecode
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime.instance = original_instance
+        Runtime.exists = original_exists
+        ScriptCache.get_bytecode = original_get_bytecode
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_session(session_id, args, start_at, epoch):
+    """Run one simulated user: load the page, then send `args.turns` prompts"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(args.seed * 1000 + session_id)
+    delay = epoch + start_at - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+    result = {
+        "session_id": session_id,
+        "first_load_ms": 0.0,
+        "rerun_ms": [],
+        "completed": 0,
+        "errors": 0,
+        "error_messages": [],
+    }
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+
+    t0 = time.perf_counter()
+    try:
+        at.run()
+    except Exception as e:
+        # The turns this session never got to send count as failures too
+        result["errors"] += 1 + args.turns
+        result["error_messages"].append(f"first load: {e}")
+        return result
+    result["first_load_ms"] = (time.perf_counter() - t0) * 1000
+
+    for turn in range(args.turns):
+        if args.think_time > 0:
+            time.sleep(rng.expovariate(1.0 / args.think_time))
+
+        prompt = f"Session {session_id} message {turn + 1}"
+        t0 = time.perf_counter()
+        try:
+            at.text_input(key="chat_input").input(prompt).run()
+            messages = [e.message for e in at.exception] + [e.value for e in at.error]
+        except Exception as e:
+            messages = [str(e)]
+        failed = bool(messages)
+        result["error_messages"].extend(messages)
+        # Failed turns still count towards latency so percentiles aren't biased
+        result["rerun_ms"].append((time.perf_counter() - t0) * 1000)
+        if failed:
+            result["errors"] += 1
+        else:
+            result["completed"] += 1
+
+    return result
+
+
+def run_load_test(args):
+    """Run all sessions and build the summary report"""
+    # The fake backend is selected through config.py, which reads the environment
+    os.environ["MINDSEEK_FAKE_BACKEND"] = "1"
+    os.environ["MINDSEEK_FAKE_LATENCY"] = str(args.latency)
+
+    import streamlit
+
+    # Poisson arrivals: exponential gaps between session starts
+    rng = random.Random(args.seed)
+    start_times = []
+    offset = 0.0
+    for _ in range(args.sessions):
+        start_times.append(offset)
+        if args.arrival_rate > 0:
+            offset += rng.expovariate(args.arrival_rate)
+
+    with shared_runtime():
+        # One untimed load first, so imports and the shared mock runtime
+        # are in place before the measured sessions start
+        from streamlit.testing.v1 import AppTest
+        AppTest.from_file(APP_PATH, default_timeout=args.timeout).run()
+
+        rss_before = _rss_bytes()
+        cpu_before = time.process_time()
+        epoch = time.perf_counter()
+
+        # Sample the thread count while sessions run to find the real peak
+        threads_peak = [threading.active_count()]
+        done = threading.Event()
+
+        def sample_threads():
+            while not done.wait(0.05):
+                threads_peak[0] = max(threads_peak[0], threading.active_count())
+
+        sampler = threading.Thread(target=sample_threads, daemon=True)
+        sampler.start()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, args.sessions)) as pool:
+                futures = [
+                    pool.submit(run_session, i, args, start_times[i], epoch)
+                    for i in range(args.sessions)
+                ]
+                sessions = [f.result() for f in futures]
+        finally:
+            done.set()
+            sampler.join()
+
+        wall = time.perf_counter() - epoch
+        cpu = time.process_time() - cpu_before
+        rss_after = _rss_bytes()
+
+    reruns = [ms for s in sessions for ms in s["rerun_ms"]]
+    completed = sum(s["completed"] for s in sessions)
+    errors = sum(s["errors"] for s in sessions)
+    error_samples = sorted({m for s in sessions for m in s["error_messages"]})[:5]
+    first_loads = [s["first_load_ms"] for s in sessions if s["first_load_ms"]]
+    rss_per_session = None
+    if rss_before is not None and rss_after is not None:
+        rss_per_session = max(0, rss_after - rss_before) / max(1, args.sessions)
+
+    return {
+        "params": {
+            "sessions": args.sessions,
+            "turns": args.turns,
+            "think_time": args.think_time,
+            "arrival_rate": args.arrival_rate,
+            "latency": args.latency,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "streamlit": getattr(streamlit, "__version__", "unknown"),
+            "cpu_count": os.cpu_count(),
+            "threads_peak": threads_peak[0],
+        },
+        "metrics": {
+            "wall_seconds": wall,
+            "completed_turns": completed,
+            "errors": errors,
+            "throughput_turns_per_sec": completed / wall if wall else 0.0,
+            "first_load_p50_ms": _percentile(first_loads, 50),
+            "rerun_p50_ms": _percentile(reruns, 50),
+            "rerun_p90_ms": _percentile(reruns, 90),
+            "rerun_p95_ms": _percentile(reruns, 95),
+            "rerun_p99_ms": _percentile(reruns, 99),
+            "rerun_max_ms": max(reruns) if reruns else 0.0,
+            "cpu_seconds_per_session": cpu / max(1, args.sessions),
+            "rss_bytes_per_session": rss_per_session,
+        },
+        "error_samples": error_samples,
+    }
+
+
+def compare_reports(current, baseline, tolerance):
+    """Return a list of human-readable regressions between two reports"""
+    regressions = []
+    if current["params"] != baseline.get("params"):
+        print("⚠️  Parameters differ from the baseline run; comparison may not be meaningful")
+
+    # The harness patches Streamlit internals, so results only compare within one version
+    old_version = baseline.get("environment", {}).get("streamlit")
+    new_version = current["environment"]["streamlit"]
+    if old_version != new_version:
+        regressions.append(
+            f"streamlit version: {old_version} -> {new_version} (runs are not comparable)"
+        )
+
+    old, new = baseline.get("metrics", {}), current["metrics"]
+    if new["errors"]:
+        regressions.append(f"errors: {old.get('errors', 0)} -> {new['errors']}")
+    for key in LOWER_IS_BETTER:
+        if old.get(key) and new.get(key) is not None and new[key] > old[key] * (1 + tolerance):
+            regressions.append(f"{key}: {old[key]:.2f} -> {new[key]:.2f}")
+    for key in HIGHER_IS_BETTER:
+        if old.get(key) and new.get(key) is not None and new[key] < old[key] * (1 - tolerance):
+            regressions.append(f"{key}: {old[key]:.2f} -> {new[key]:.2f}")
+    return regressions
+
+
+def print_report(report):
+    """Print the summary table"""
+    m = report["metrics"]
+    p = report["params"]
+    print(f"\n📊 {p['sessions']} sessions x {p['turns']} turns "
+          f"(think {p['think_time']}s, arrival {p['arrival_rate'] or 'burst'}/s, latency {p['latency']}s)")
+    print(f"   Wall time:        {m['wall_seconds']:.2f} s")
+    print(f"   Completed turns:  {m['completed_turns']} ({m['errors']} errors)")
+    print(f"   Throughput:       {m['throughput_turns_per_sec']:.2f} turns/s")
+    print(f"   First load p50:   {m['first_load_p50_ms']:.1f} ms")
+    print(f"   Rerun p50/p90:    {m['rerun_p50_ms']:.1f} / {m['rerun_p90_ms']:.1f} ms")
+    print(f"   Rerun p95/p99:    {m['rerun_p95_ms']:.1f} / {m['rerun_p99_ms']:.1f} ms")
+    print(f"   Rerun max:        {m['rerun_max_ms']:.1f} ms")
+    print(f"   CPU per session:  {m['cpu_seconds_per_session']:.3f} s")
+    if m["rss_bytes_per_session"] is not None:
+        print(f"   RSS per session:  {m['rss_bytes_per_session'] / 1024:.1f} KiB")
+
+
+def main(argv=None):
+    """Run the load test and optionally compare against a baseline"""
+    args = parse_args(argv)
+    print("🧠 MindSeek load test (offline fake backend)")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = run_load_test(args)
+    print_report(report)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report written to {args.output}")
+
+    if report["metrics"]["errors"]:
+        print(f"\n❌ {report['metrics']['errors']} turns failed; latency and throughput are not trustworthy")
+        for message in report["error_samples"]:
+            print(f"   {message}")
+        if baseline is None:
+            return 1
+
+    if baseline is not None:
+        regressions = compare_reports(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressions vs {args.compare} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ No regressions vs {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# messages.py
+"""
+Compact chat history storage.
+
+`MessageLog` keeps a session's messages in columns instead of one dict per
+message: roles are one byte each (an index into ROLES), timestamps are
+epoch floats in an array, and message ids are implied by position. The
+"%H:%M" string is only produced when a message is rendered.
+"""
+import pickle
+import time
+import tracemalloc
+from array import array
+from collections import namedtuple
+from datetime import date, datetime
+
+ROLES = ("user", "assistant")
+_ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+# Lightweight row handed out while iterating; not stored in the log
+Message = namedtuple("Message", ["role", "content", "created_at", "message_id"])
+
+
+def format_time(created_at, fmt: str = "%H:%M") -> str:
+    """Format an epoch timestamp for display."""
+    return datetime.fromtimestamp(created_at).strftime(fmt)
+
+
+def _parse_time(value, fmt: str = "%H:%M"):
+    """Epoch timestamp for an old "%H:%M" string on today's date, or None if unusable."""
+    try:
+        parsed = datetime.strptime(value, fmt)
+    except (TypeError, ValueError):
+        return None
+    return datetime.combine(date.today(), parsed.time()).timestamp()
+
+
+class MessageLog:
+    """Column-oriented, picklable list of chat messages."""
+
+    __slots__ = ("_roles", "_contents", "_created")
+
+    def __init__(self):
+        self._roles = array("B")
+        self._contents = []
+        self._created = array("d")
+
+    def append(self, role: str, content: str, created_at: float = None):
+        """Add a message and return its 1-based message id."""
+        self._roles.append(_ROLE_CODES[role])
+        self._contents.append(content)
+        self._created.append(time.time() if created_at is None else created_at)
+        return len(self._contents)
+
+    def __len__(self):
+        return len(self._contents)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return Message(
+            ROLES[self._roles[index]],
+            self._contents[index],
+            self._created[index],
+            index + 1,
+        )
+
+    def __iter__(self):
+        for index, content in enumerate(self._contents):
+            yield Message(ROLES[self._roles[index]], content, self._created[index], index + 1)
+
+    def __getstate__(self):
+        return (self._roles, self._contents, self._created)
+
+    def __setstate__(self, state):
+        self._roles, self._contents, self._created = state
+
+    @classmethod
+    def from_dicts(cls, messages):
+        """Convert the old list-of-dicts history, keeping "%H:%M" times (on today's date)."""
+        log = cls()
+        for message in messages:
+            log.append(message["role"], message["content"], _parse_time(message.get("timestamp")))
+        return log
+
+    @classmethod
+    def upgrade(cls, messages):
+        """
+        Return a session's history as a MessageLog of this class. Old
+        list-of-dicts histories are converted. A MessageLog created before
+        a hot reload of this module fails isinstance, so it is recognised by
+        its columns and copied across.
+        """
+        if isinstance(messages, cls):
+            return messages
+        if hasattr(messages, "_contents"):
+            log = cls()
+            log.__setstate__(messages.__getstate__())
+            return log
+        return cls.from_dicts(messages)
+
+    def to_dicts(self):
+        """Expand to the old list-of-dicts format."""
+        return [
+            {
+                "role": m.role,
+                "content": m.content,
+                "timestamp": format_time(m.created_at),
+                "message_id": m.message_id,
+            }
+            for m in self
+        ]
+
+
+def _traced_bytes(build):
+    """Bytes allocated (per tracemalloc) by building and holding an object."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        obj = build()
+        after = tracemalloc.get_traced_memory()[0]
+        del obj
+    finally:
+        if started:
+            tracemalloc.stop()
+    return max(0, after - before)
+
+
+def memory_report(log: MessageLog, comparisons: dict = None) -> dict:
+    """
+    Measure the memory a session's history takes, compared with the old
+    list-of-dicts format. Both structures are rebuilt from a pickle under
+    tracemalloc so the numbers include every nested object. Allocations
+    from other sessions running at the same moment can add some noise.
+    Comparison answers (message_id -> comparison) are measured separately.
+    """
+    compact_pickle = pickle.dumps(log)
+    dict_pickle = pickle.dumps(log.to_dicts())
+    comparisons_pickle = pickle.dumps(comparisons or {})
+    count = len(log)
+
+    compact_bytes = _traced_bytes(lambda: pickle.loads(compact_pickle))
+    dict_bytes = _traced_bytes(lambda: pickle.loads(dict_pickle))
+    comparison_bytes = _traced_bytes(lambda: pickle.loads(comparisons_pickle)) if comparisons else 0
+    return {
+        "messages": count,
+        "comparison_answers": sum(len(c["results"]) for c in (comparisons or {}).values()),
+        "comparison_bytes": comparison_bytes,
+        "compact_bytes": compact_bytes,
+        "dict_bytes": dict_bytes,
+        "compact_bytes_per_message": compact_bytes / count if count else 0.0,
+        "dict_bytes_per_message": dict_bytes / count if count else 0.0,
+        "compact_pickle_bytes": len(compact_pickle),
+        "dict_pickle_bytes": len(dict_pickle),
+    }
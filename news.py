@@ -3,6 +3,7 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from html import unescape
 import feedparser
+import tracing
 
 # Google News RSS accepts:
 #   hl=<language-REGION> (UI language)
@@ -45,22 +46,24 @@ def fetch_news(
     Returns a list of dicts: title, summary, link, source, time.
     """
     url = _build_url(country=country, language=language, topic_key=topic_key)
-    feed = feedparser.parse(url)
+    with tracing.span("news.fetch", topic=topic_key, country=country):
+        feed = feedparser.parse(url)
 
     items = []
-    for e in feed.entries[:limit]:
-        # published_parsed is in UTC
-        ts_str = ""
-        if getattr(e, "published_parsed", None):
-            dt_utc = datetime(*e.published_parsed[:6], tzinfo=ZoneInfo("UTC"))
-            dt_local = dt_utc.astimezone(ZoneInfo(display_tz))
-            ts_str = dt_local.strftime("%b %d, %I:%M %p")
+    with tracing.span("news.parse", entries=len(feed.entries)):
+        for e in feed.entries[:limit]:
+            # published_parsed is in UTC
+            ts_str = ""
+            if getattr(e, "published_parsed", None):
+                dt_utc = datetime(*e.published_parsed[:6], tzinfo=ZoneInfo("UTC"))
+                dt_local = dt_utc.astimezone(ZoneInfo(display_tz))
+                ts_str = dt_local.strftime("%b %d, %I:%M %p")
 
-        items.append({
-            "title": unescape(getattr(e, "title", "")),
-            "summary": unescape(getattr(e, "summary", ""))[:300],
-            "link": getattr(e, "link", ""),
-            "source": getattr(e, "source", {}).get("title", getattr(e, "publisher", "")),
-            "time": ts_str,
-        })
+            items.append({
+                "title": unescape(getattr(e, "title", "")),
+                "summary": unescape(getattr(e, "summary", ""))[:300],
+                "link": getattr(e, "link", ""),
+                "source": getattr(e, "source", {}).get("title", getattr(e, "publisher", "")),
+                "time": ts_str,
+            })
     return items
@@ -0,0 +1,235 @@
+# tracing.py
+"""
+Lightweight per-turn tracing.
+
+A trace covers one chat turn (or one background job) and is made of
+nested spans, e.g. turn -> context / upstream / render / rerun. Finished
+traces are appended to TRACE_FILE as one JSON object per line, and
+`waterfall_html` draws a trace for the Debug Info panel.
+
+Tracing is off unless MINDSEEK_TRACE=1. When it is off, or a turn was not
+sampled, `span()` returns a shared no-op context manager, so instrumented
+code pays for one ContextVar lookup and nothing else.
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config import TRACE_ENABLED, TRACE_FILE, TRACE_MAX_BYTES, TRACE_SAMPLE_RATE
+
+_current_trace = ContextVar("mindseek_trace", default=None)
+_current_span = ContextVar("mindseek_span", default=None)
+_write_lock = threading.Lock()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    def __init__(self, name: str, attrs: dict):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.spans = []
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.elapsed_ms(),
+            "attrs": self.attrs,
+            "spans": self.spans,
+        }
+
+
+class Span:
+    """One timed stage; use as a context manager or via start_span/end_span."""
+
+    def __init__(self, trace: Trace, name: str, attrs: dict):
+        self.trace = trace
+        self.record = {
+            "span_id": uuid.uuid4().hex[:8],
+            "parent_id": _current_span.get(),
+            "name": name,
+            "start_ms": trace.elapsed_ms(),
+            "duration_ms": None,
+            "attrs": attrs,
+        }
+        self._token = None
+
+    def set(self, **attrs):
+        self.record["attrs"].update(attrs)
+
+    def __enter__(self):
+        self._token = _current_span.set(self.record["span_id"])
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record["duration_ms"] = self.trace.elapsed_ms() - self.record["start_ms"]
+        if exc_type is not None:
+            self.record["attrs"]["error"] = exc_type.__name__
+        self.trace.spans.append(self.record)
+        _current_span.reset(self._token)
+        return False
+
+
+def begin_trace(name: str, **attrs):
+    """Start a trace in the current context if tracing is on and the turn is sampled."""
+    if not TRACE_ENABLED or random.random() >= TRACE_SAMPLE_RATE:
+        _current_trace.set(None)
+        return None
+    current = Trace(name, attrs)
+    _current_trace.set(current)
+    _current_span.set(None)
+    return current
+
+
+def end_trace():
+    """Finish the current trace, if any, and append it to TRACE_FILE."""
+    current = _current_trace.get()
+    if current is None:
+        return None
+    _current_trace.set(None)
+    _current_span.set(None)
+    data = current.to_dict()
+    _export(data)
+    return data
+
+
+def discard_stale_trace(keep_id: str = None):
+    """
+    Drop the current trace unless its id is `keep_id`, without exporting it.
+    A run cut short (st.rerun, st.stop) never reaches end_trace, and the
+    next run reuses the same thread and so the same ContextVar.
+    """
+    current = _current_trace.get()
+    if current is not None and current.trace_id != keep_id:
+        _current_trace.set(None)
+        _current_span.set(None)
+
+
+@contextmanager
+def job_trace(name: str, **attrs):
+    """Trace a self-contained job such as a background refresh."""
+    begin_trace(name, **attrs)
+    try:
+        yield
+    finally:
+        end_trace()
+
+
+def span(name: str, **attrs):
+    """Time a stage of the current trace (no-op when nothing is being traced)."""
+    current = _current_trace.get()
+    if current is None:
+        return _NOOP
+    return Span(current, name, attrs)
+
+
+def start_span(name: str, **attrs):
+    """Open a span that can't be wrapped in a with-block; close it with end_span."""
+    s = span(name, **attrs)
+    s.__enter__()
+    return s
+
+
+def end_span(s):
+    s.__exit__(None, None, None)
+
+
+def _export(data: dict):
+    line = json.dumps(data) + "\n"
+    with _write_lock:
+        try:
+            # Keep one rotated file so the trace log can't grow without bound
+            if os.path.exists(TRACE_FILE) and os.path.getsize(TRACE_FILE) > TRACE_MAX_BYTES:
+                os.replace(TRACE_FILE, TRACE_FILE + ".1")
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"⚠️  Could not write trace: {e}")
+
+
+def _tail_lines(path: str, max_bytes: int = 512 * 1024):
+    """The lines in the last max_bytes of a file, or [] if it can't be read."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - max_bytes))
+            return f.read().decode("utf-8", errors="ignore").splitlines()
+    except OSError:
+        return []
+
+
+def recent_traces(limit: int = 5, name: str = None):
+    """Return the most recent traces, newest first, reading the rotated file if needed."""
+    traces = []
+    for path in (TRACE_FILE, TRACE_FILE + ".1"):
+        for line in reversed(_tail_lines(path)):
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue  # partial first line after seeking
+            if name is None or data.get("name") == name:
+                traces.append(data)
+                if len(traces) >= limit:
+                    return traces
+    return traces
+
+
+def waterfall_html(data: dict) -> str:
+    """Render a trace as rows of offset bars, one per span, in start order."""
+    total = max(data["duration_ms"], 1e-6)
+    depth = {}
+    by_id = {s["span_id"]: s for s in data["spans"]}
+
+    def depth_of(s):
+        if s["span_id"] not in depth:
+            parent = by_id.get(s["parent_id"])
+            depth[s["span_id"]] = 0 if parent is None else depth_of(parent) + 1
+        return depth[s["span_id"]]
+
+    rows = []
+    for s in sorted(data["spans"], key=lambda s: s["start_ms"]):
+        left = s["start_ms"] / total * 100
+        width = max(s["duration_ms"] / total * 100, 0.5)
+        label = s["name"] + (f" · {s['attrs']['model']}" if "model" in s["attrs"] else "")
+        rows.append(f"""
+        <div style="display: flex; align-items: center; font-size: 0.75rem; margin: 2px 0;">
+            <div style="width: 40%; padding-left: {depth_of(s) * 0.75}rem; white-space: nowrap; overflow: hidden;">{label}</div>
+            <div style="width: 60%; position: relative; height: 0.9rem; background: rgba(128,128,128,0.1);">
+                <div style="position: absolute; left: {left:.2f}%; width: {width:.2f}%; height: 100%;
+                            background: linear-gradient(90deg, #667eea 0%, #764ba2 100%); border-radius: 2px;"
+                     title="{s['duration_ms']:.1f} ms"></div>
+            </div>
+        </div>""")
+
+    started = time.strftime("%H:%M:%S", time.localtime(data["started_at"]))
+    return f"""
+    <div style="margin-bottom: 1rem;">
+        <div style="font-weight: 600; font-size: 0.8rem;">{data['name']} @ {started} — {data['duration_ms']:.0f} ms</div>
+        {''.join(rows)}
+    </div>
+    """